@@ -0,0 +1,56 @@
+import os
+import socket
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+# Repository root, so the app modules can be imported/launched from here
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# Environment for the child processes. Falls back to a throwaway SQLite
+# database when PG_URL isn't configured so the benchmarks run anywhere.
+def app_env(**extra) -> dict:
+    env = dict(os.environ)
+    if not env.get("PG_URL"):
+        from dotenv import dotenv_values
+
+        env.update({k: v for k, v in dotenv_values(os.path.join(ROOT, ".env")).items() if v})
+    if not env.get("PG_URL"):
+        path = os.path.join(tempfile.gettempdir(), "cobads_bench.db")
+        env["PG_URL"] = f"sqlite:///{path}"
+        create_tables(env["PG_URL"])
+    env["PYTHONPATH"] = ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    env.update(extra)
+    return env
+
+
+def create_tables(url: str):
+    import subprocess
+
+    code = "import models; from database import Base, engine; Base.metadata.create_all(engine)"
+    subprocess.run([sys.executable, "-c", code], cwd=ROOT, env={**os.environ, "PG_URL": url}, check=True)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+# Poll `url` until it answers with any HTTP status; returns the time it
+# took or raises TimeoutError
+def wait_for_http(url: str, timeout: float = 30.0, interval: float = 0.005) -> float:
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        try:
+            with urllib.request.urlopen(url, timeout=1):
+                pass
+            return time.perf_counter() - start
+        except urllib.error.HTTPError:
+            return time.perf_counter() - start
+        except OSError:
+            time.sleep(interval)
+    raise TimeoutError(f"{url} did not respond within {timeout}s")
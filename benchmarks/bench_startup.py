@@ -0,0 +1,99 @@
+"""Startup benchmark: import time of main.py and time to first response.
+
+    python benchmarks/bench_startup.py --runs 5 --max-import-ms 800 --max-first-response-ms 3000
+
+Exits non-zero when a threshold is exceeded or when one of the lazily
+imported modules (bcrypt, python-jose, cryptography) is loaded by
+`import main` again, so it can run as a startup regression check in CI.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+from _common import ROOT, app_env, free_port, wait_for_http
+
+# Modules that must stay off the import path of main.py
+LAZY_MODULES = ("bcrypt", "jose", "cryptography")
+
+IMPORT_SNIPPET = f"""
+import json, sys, time
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+eager = [m for m in {LAZY_MODULES!r} if m in sys.modules]
+print(json.dumps({{"import_s": elapsed, "eager": eager}}))
+"""
+
+
+def measure_import(env: dict) -> tuple[float, float, list]:
+    start = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET], cwd=ROOT, env=env, check=True, capture_output=True, text=True
+    ).stdout
+    total = time.perf_counter() - start
+    result = json.loads(out.strip().splitlines()[-1])
+    return result["import_s"], total, result["eager"]
+
+
+# Time from spawning the server process until the first request that goes
+# through the database gets its response
+def measure_first_response(env: dict, path: str) -> float:
+    port = free_port()
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT,
+        env=env,
+    )
+    try:
+        wait_for_http(f"http://127.0.0.1:{port}{path}")
+        return time.perf_counter() - start
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--path", default="/announcements", help="endpoint used for the first request")
+    parser.add_argument("--max-import-ms", type=float, default=None)
+    parser.add_argument("--max-first-response-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    env = app_env()
+
+    imports, totals, eager = [], [], set()
+    for _ in range(args.runs):
+        import_s, total_s, eager_modules = measure_import(env)
+        imports.append(import_s * 1000)
+        totals.append(total_s * 1000)
+        eager.update(eager_modules)
+
+    first = [measure_first_response(env, args.path) * 1000 for _ in range(args.runs)]
+
+    import_ms = statistics.median(imports)
+    first_ms = statistics.median(first)
+    print(f"import main:           {import_ms:8.1f} ms (median of {args.runs})")
+    print(f"python -c 'import main':{statistics.median(totals):7.1f} ms (incl. interpreter start)")
+    print(f"time to first response:{first_ms:8.1f} ms (GET {args.path})")
+    print(f"eagerly imported:       {', '.join(sorted(eager)) or 'none'}")
+
+    failed = False
+    if eager:
+        print(f"FAIL: {', '.join(sorted(eager))} imported by main.py", file=sys.stderr)
+        failed = True
+    if args.max_import_ms is not None and import_ms > args.max_import_ms:
+        print(f"FAIL: import time {import_ms:.1f} ms > {args.max_import_ms} ms", file=sys.stderr)
+        failed = True
+    if args.max_first_response_ms is not None and first_ms > args.max_first_response_ms:
+        print(f"FAIL: first response {first_ms:.1f} ms > {args.max_first_response_ms} ms", file=sys.stderr)
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Throughput benchmark for the gunicorn profile at increasing worker counts.
+
+    python benchmarks/bench_workers.py --workers 1 2 4 --duration 10 --clients 32
+
+Starts `gunicorn -c gunicorn_conf.py main:app` once per worker count, drives
+it with keep-alive client processes for `--duration` seconds and reports
+requests per second and the speed-up over the first worker count. The load
+generator runs on the same machine, so leave it some cores: the numbers are
+meant for spotting scaling regressions, not absolute capacity.
+"""
+import argparse
+import http.client
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+from _common import ROOT, app_env, free_port, wait_for_http
+
+
+def client(port: int, path: str, deadline: float, results):
+    done = errors = 0
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    while time.time() < deadline:
+        try:
+            conn.request("GET", path)
+            response = conn.getresponse()
+            response.read()
+            if response.status < 500:
+                done += 1
+            else:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    conn.close()
+    results.put((done, errors))
+
+
+def run(workers: int, args) -> tuple[float, int]:
+    port = free_port()
+    env = app_env(WEB_CONCURRENCY=str(workers), BIND=f"127.0.0.1:{port}", ACCESS_LOG="", LOG_LEVEL="warning")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn_conf.py", "main:app"], cwd=ROOT, env=env
+    )
+    try:
+        wait_for_http(f"http://127.0.0.1:{port}{args.path}", timeout=60)
+        # Let every worker finish its startup warm-up before measuring
+        time.sleep(args.settle)
+
+        results = multiprocessing.Queue()
+        deadline = time.time() + args.duration
+        clients = [
+            multiprocessing.Process(target=client, args=(port, args.path, deadline, results))
+            for _ in range(args.clients)
+        ]
+        for proc in clients:
+            proc.start()
+        counts = [results.get() for _ in clients]
+        for proc in clients:
+            proc.join()
+    finally:
+        server.terminate()
+        server.wait()
+
+    done = sum(c[0] for c in counts)
+    errors = sum(c[1] for c in counts)
+    return done / args.duration, errors
+
+
+def main():
+    cores = os.cpu_count() or 1
+    default_workers = sorted({1, *(n for n in (2, 4, 8, 16) if n <= cores), cores})
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=default_workers)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--clients", type=int, default=max(8, 4 * cores))
+    parser.add_argument("--path", default="/announcements")
+    parser.add_argument("--settle", type=float, default=2.0)
+    args = parser.parse_args()
+
+    print(f"{cores} CPU cores, {args.clients} clients, {args.duration:g}s per run, GET {args.path}")
+    print(f"{'workers':>8} {'req/s':>10} {'speed-up':>9} {'errors':>7}")
+    baseline = None
+    for workers in args.workers:
+        rps, errors = run(workers, args)
+        baseline = baseline or rps
+        print(f"{workers:>8} {rps:>10.1f} {rps / baseline:>8.2f}x {errors:>7}")
+
+
+if __name__ == "__main__":
+    main()
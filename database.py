@@ -1,4 +1,6 @@
-from sqlalchemy import create_engine
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -11,8 +13,15 @@ load_dotenv()
 
 DATABASE_URL = os.getenv("PG_URL")
 
+# Connection pool sizing (shared by the pool prewarm and the server threadpool)
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+
+# Number of pool connections to open at startup, capped at POOL_SIZE
+POOL_PREWARM = int(os.getenv("DB_POOL_PREWARM", str(POOL_SIZE)))
+
 # Set up the database engine and session
-engine = create_engine(DATABASE_URL)
+engine = create_engine(DATABASE_URL, pool_size=POOL_SIZE, max_overflow=MAX_OVERFLOW)
 
 # Create a sessionmaker to generate DB sessions
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -27,3 +36,56 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Open up to `count` pool connections in parallel so the first requests
+# after a cold start don't pay for connection setup
+def prewarm_pool(count: int = POOL_PREWARM) -> int:
+    count = max(0, min(count, POOL_SIZE))
+    if count == 0:
+        return 0
+
+    def _connect():
+        conn = engine.connect()
+        try:
+            conn.execute(text("SELECT 1"))
+        except Exception:
+            conn.close()
+            raise
+        return conn
+
+    with ThreadPoolExecutor(max_workers=count) as executor:
+        futures = [executor.submit(_connect) for _ in range(count)]
+
+    connections = [f.result() for f in futures if f.exception() is None]
+
+    # Returning the connections checks them back into the pool, still open
+    for conn in connections:
+        conn.close()
+
+    errors = [f.exception() for f in futures if f.exception() is not None]
+    if errors:
+        raise errors[0]
+
+    return len(connections)
+
+# Create the given tables (and their enum types) if they don't exist yet,
+# since there are no migrations. Several workers may start at once, so a
+# CREATE that loses the race is retried and ignored once the table exists.
+def ensure_tables(tables: list) -> list:
+    created = []
+    for table in tables:
+        for attempt in range(2):
+            if has_table(table.name):
+                break
+            try:
+                Base.metadata.create_all(engine, tables=[table], checkfirst=True)
+                created.append(table.name)
+                break
+            except DBAPIError:
+                if attempt == 1 and not has_table(table.name):
+                    raise
+    return created
+
+
+def has_table(name: str) -> bool:
+    return inspect(engine).has_table(name)
@@ -0,0 +1,253 @@
+# Grid index behind GET /food/map. The map_points / map_cells tables are
+# created on startup when missing and kept up to date by the listing
+# create/delete routes; listings that existed before that have to be
+# indexed once with
+#
+#     python geo_index.py
+#
+# which rebuilds both tables from share_food and need_food.
+import math
+import os
+from typing import Optional
+
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from models import MapCell, MapPoint, NeedFood, ShareFood
+
+# Zoom level from which /food/map returns individual points instead of clusters
+MAP_POINTS_ZOOM = int(os.getenv("MAP_POINTS_ZOOM", "16"))
+# Clusters at map zoom z come from a grid of 2^(z + offset) cells per axis,
+# i.e. 2^offset cells across a 256px tile (offset 3 gives ~32px cells)
+MAP_CELL_OFFSET = int(os.getenv("MAP_CELL_OFFSET", "3"))
+# Upper bound on points returned by one high-zoom request
+MAP_MAX_POINTS = int(os.getenv("MAP_MAX_POINTS", "5000"))
+# Upper bound on grid cells one cluster request may cover (64x64 cells is
+# 8x8 tiles, more than a full-screen map)
+MAP_MAX_CELLS = int(os.getenv("MAP_MAX_CELLS", "4096"))
+
+# Web Mercator stops at this latitude
+MAX_LAT = 85.05112878
+
+LISTING_MODELS = {"share": ShareFood, "need": NeedFood}
+
+# Dialects with INSERT .. ON CONFLICT DO UPDATE
+UPSERT_INSERTS = {"postgresql": postgresql_insert, "sqlite": sqlite_insert}
+
+
+# Parse a "lat,lng" koordinat string; None if it isn't a valid coordinate
+def parse_koordinat(koordinat: Optional[str]) -> Optional[tuple]:
+    try:
+        lat, lng = (float(part) for part in koordinat.split(","))
+    except (AttributeError, ValueError):
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return None
+    return lat, lng
+
+
+# Grid cell containing (lat, lng) at a grid of 2^level cells per axis
+def cell_xy(lat: float, lng: float, level: int) -> tuple:
+    n = 2 ** level
+    lat = max(-MAX_LAT, min(MAX_LAT, lat))
+    x = int((lng + 180.0) / 360.0 * n)
+    lat_rad = math.radians(lat)
+    y = int((1.0 - math.log(math.tan(lat_rad) + 1.0 / math.cos(lat_rad)) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def _cell_rows(kind: str, lat: float, lng: float, jumlah: int, sign: int) -> list:
+    rows = []
+    for zoom in range(MAP_POINTS_ZOOM):
+        x, y = cell_xy(lat, lng, zoom + MAP_CELL_OFFSET)
+        rows.append({
+            "kind": kind, "zoom": zoom, "x": x, "y": y,
+            "count": sign, "sum_lat": sign * lat, "sum_lng": sign * lng, "sum_jumlah": sign * jumlah,
+        })
+    return rows
+
+
+# Combine deltas that target the same cell and sort them by (zoom, x, y, kind),
+# so every transaction touches a cell once and all of them lock cells in the
+# same order (no deadlocks between concurrent writers)
+def _merge_cell_rows(rows: list) -> list:
+    merged = {}
+    for row in rows:
+        key = (row["zoom"], row["x"], row["y"], row["kind"])
+        cell = merged.get(key)
+        if cell is None:
+            merged[key] = dict(row)
+            continue
+        for field in ("count", "sum_lat", "sum_lng", "sum_jumlah"):
+            cell[field] += row[field]
+    return [merged[key] for key in sorted(merged)]
+
+
+# Add all deltas of a transaction to their cells, creating missing cells. Uses
+# INSERT .. ON CONFLICT on PostgreSQL/SQLite so concurrent inserts into a new
+# cell don't collide; a single statement unless there are more than
+# CELL_BATCH_SIZE cells (only when rebuilding).
+CELL_BATCH_SIZE = 1000
+
+
+def _apply_cell_deltas(db: Session, rows: list):
+    rows = _merge_cell_rows(rows)
+    insert = UPSERT_INSERTS.get(db.get_bind().dialect.name)
+    if insert is not None:
+        for start in range(0, len(rows), CELL_BATCH_SIZE):
+            stmt = insert(MapCell).values(rows[start:start + CELL_BATCH_SIZE])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["zoom", "x", "y", "kind"],
+                set_={
+                    "count": MapCell.count + stmt.excluded.count,
+                    "sum_lat": MapCell.sum_lat + stmt.excluded.sum_lat,
+                    "sum_lng": MapCell.sum_lng + stmt.excluded.sum_lng,
+                    "sum_jumlah": MapCell.sum_jumlah + stmt.excluded.sum_jumlah,
+                },
+            )
+            db.execute(stmt)
+        return
+
+    for row in rows:
+        updated = db.query(MapCell).filter(
+            MapCell.zoom == row["zoom"], MapCell.x == row["x"], MapCell.y == row["y"], MapCell.kind == row["kind"]
+        ).update({
+            MapCell.count: MapCell.count + row["count"],
+            MapCell.sum_lat: MapCell.sum_lat + row["sum_lat"],
+            MapCell.sum_lng: MapCell.sum_lng + row["sum_lng"],
+            MapCell.sum_jumlah: MapCell.sum_jumlah + row["sum_jumlah"],
+        }, synchronize_session=False)
+        if not updated:
+            db.add(MapCell(**row))
+            db.flush()
+
+
+# MapPoint and cell deltas for a listing, or None without a parseable koordinat
+def _listing_point(kind: str, listing) -> Optional[tuple]:
+    coords = parse_koordinat(listing.koordinat)
+    if coords is None:
+        return None
+    lat, lng = coords
+    jumlah = listing.jumlah_makanan or 0
+    point = MapPoint(kind=kind, listing_id=listing.id, lat=lat, lng=lng, jumlah_makanan=jumlah)
+    return point, _cell_rows(kind, lat, lng, jumlah, 1)
+
+
+# Add a listing to the index. Call right before the commit that inserts the
+# listing (after a flush, so it has an id), which keeps the cell locks short.
+# Listings without a parseable koordinat are left off the map.
+def index_listing(db: Session, kind: str, listing) -> bool:
+    indexed = _listing_point(kind, listing)
+    if indexed is None:
+        return False
+    point, rows = indexed
+    db.add(point)
+    _apply_cell_deltas(db, rows)
+    return True
+
+
+# Remove listings from the index, in the same transaction as their delete.
+# All cell updates go out as one merged, ordered statement.
+def unindex_listings(db: Session, kind: str, listing_ids: list) -> int:
+    if not listing_ids:
+        return 0
+    points = db.query(MapPoint).filter(MapPoint.kind == kind, MapPoint.listing_id.in_(listing_ids)).all()
+    if not points:
+        return 0
+    rows = []
+    for point in points:
+        rows.extend(_cell_rows(kind, point.lat, point.lng, point.jumlah_makanan or 0, -1))
+    _apply_cell_deltas(db, rows)
+    db.query(MapPoint).filter(MapPoint.id.in_([p.id for p in points])).delete(synchronize_session=False)
+    return len(points)
+
+
+def unindex_listing(db: Session, kind: str, listing_id: int) -> bool:
+    return unindex_listings(db, kind, [listing_id]) > 0
+
+
+# Rebuild the whole index from the listing tables (initial backfill)
+def rebuild_index(db: Session) -> int:
+    db.query(MapCell).delete()
+    db.query(MapPoint).delete()
+    points, rows = [], []
+    for kind, model in LISTING_MODELS.items():
+        for listing in db.query(model).all():
+            indexed = _listing_point(kind, listing)
+            if indexed is not None:
+                points.append(indexed[0])
+                rows.extend(indexed[1])
+    db.add_all(points)
+    _apply_cell_deltas(db, rows)
+    db.commit()
+    return len(points)
+
+
+class BBoxTooLarge(ValueError):
+    pass
+
+
+# Clusters (zoom < MAP_POINTS_ZOOM) or points inside a bbox of
+# (min_lng, min_lat, max_lng, max_lat)
+def query_map(db: Session, bbox: tuple, zoom: int, kind: Optional[str] = None) -> dict:
+    min_lng, min_lat, max_lng, max_lat = bbox
+
+    if zoom >= MAP_POINTS_ZOOM:
+        query = db.query(MapPoint).filter(
+            MapPoint.lat.between(min_lat, max_lat), MapPoint.lng.between(min_lng, max_lng)
+        )
+        if kind:
+            query = query.filter(MapPoint.kind == kind)
+        points = query.order_by(MapPoint.kind, MapPoint.listing_id).limit(MAP_MAX_POINTS + 1).all()
+        truncated = len(points) > MAP_MAX_POINTS
+        points = points[:MAP_MAX_POINTS]
+        return {
+            "zoom": zoom,
+            "truncated": truncated,
+            "points": [
+                {"type": p.kind, "id": p.listing_id, "lat": p.lat, "lng": p.lng, "jumlah_makanan": p.jumlah_makanan}
+                for p in points
+            ],
+        }
+
+    level = zoom + MAP_CELL_OFFSET
+    min_x, min_y = cell_xy(max_lat, min_lng, level)
+    max_x, max_y = cell_xy(min_lat, max_lng, level)
+    # Without this a world-sized bbox at high zoom returns about one cell per listing
+    cells_in_bbox = (max_x - min_x + 1) * (max_y - min_y + 1)
+    if cells_in_bbox > MAP_MAX_CELLS:
+        raise BBoxTooLarge(f"bbox covers {cells_in_bbox} cells at zoom {zoom}, the limit is {MAP_MAX_CELLS}")
+    query = db.query(MapCell).filter(
+        MapCell.zoom == zoom,
+        MapCell.x.between(min_x, max_x),
+        MapCell.y.between(min_y, max_y),
+        MapCell.count > 0,
+    )
+    if kind:
+        query = query.filter(MapCell.kind == kind)
+    cells = query.order_by(MapCell.x, MapCell.y, MapCell.kind).all()
+    return {
+        "zoom": zoom,
+        "clusters": [
+            {
+                "type": c.kind,
+                "count": c.count,
+                # Rounded so float drift from the incremental updates doesn't leak out
+                "lat": round(c.sum_lat / c.count, 6),
+                "lng": round(c.sum_lng / c.count, 6),
+                "jumlah_makanan": c.sum_jumlah,
+            }
+            for c in cells
+        ],
+    }
+
+
+if __name__ == "__main__":
+    from database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        print(f"Indexed {rebuild_index(db)} listings")
+    finally:
+        db.close()
@@ -0,0 +1,72 @@
+# Production server configuration:
+#
+#     gunicorn -c gunicorn_conf.py main:app
+#
+# Every setting can be overridden through the environment variables below.
+import math
+import os
+import sys
+
+
+# CPUs this process may actually use: the affinity mask, further limited by
+# a cgroup v2 CPU quota when running in a container
+def available_cpus() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        cpus = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+# Address to listen on
+bind = os.getenv("BIND", f"0.0.0.0:{os.getenv('PORT', '8000')}")
+
+# One uvicorn worker (and event loop) per available core by default, capped
+# at MAX_WORKERS. The workers pick uvloop and httptools automatically when
+# they are installed.
+MAX_WORKERS = int(os.getenv("MAX_WORKERS", "8"))
+workers = int(os.getenv("WEB_CONCURRENCY", str(min(available_cpus(), MAX_WORKERS))))
+
+# DB_POOL_SIZE and DB_MAX_OVERFLOW apply per worker, since every worker has
+# its own engine. Unless they are set explicitly, split a total budget of
+# DB_MAX_CONNECTIONS across the workers (half pooled, half overflow, at most
+# 20 per worker) so the whole server stays under the database's connection
+# limit. The pool size also sets the startup prewarm and the threadpool limit.
+DB_MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS", "80"))
+_per_worker = max(2, min(20, DB_MAX_CONNECTIONS // workers))
+os.environ.setdefault("DB_POOL_SIZE", str(_per_worker // 2))
+os.environ.setdefault("DB_MAX_OVERFLOW", str(_per_worker - _per_worker // 2))
+
+worker_class = os.getenv("WORKER_CLASS", "uvicorn_worker.UvicornWorker")
+
+# Recycle workers after a number of requests; the jitter keeps them from
+# all restarting at the same moment
+max_requests = int(os.getenv("MAX_REQUESTS", "10000"))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", "1000"))
+
+# Import the app once in the master before forking (faster worker boot,
+# shared memory pages). Off by default so code reloads stay per worker.
+preload_app = os.getenv("PRELOAD_APP", "0") == "1"
+
+timeout = int(os.getenv("TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("KEEPALIVE", "5"))
+
+accesslog = os.getenv("ACCESS_LOG", "-") or None
+errorlog = os.getenv("ERROR_LOG", "-")
+loglevel = os.getenv("LOG_LEVEL", "info")
+
+
+# With preload_app the engine is created in the master; drop any pooled
+# connections inherited through fork so workers never share a socket
+def post_fork(server, worker):
+    database = sys.modules.get("database")
+    if database is not None:
+        database.engine.dispose(close=False)
@@ -5,10 +5,12 @@ from routes.auth import auth_router
 from routes.need_routes import need_router
 from routes.share_routes import share_router
 from routes.announcements import announcements_router
+from routes.map_routes import map_router
+from startup import lifespan
 
 
-# Initialize the FastAPI app
-app = FastAPI()
+# Initialize the FastAPI app (the lifespan hook prewarms the DB pool on startup)
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -22,6 +24,7 @@ app.add_middleware(
 app.include_router(auth_router, prefix="/auth", tags=["Authentication"])
 app.include_router(need_router, prefix="/food", tags=["Need Food Routes"])
 app.include_router(share_router, prefix="/food", tags=["Share Food Routes"])
+app.include_router(map_router, prefix="/food", tags=["Map Routes"])
 app.include_router(announcements_router, prefix="/announcements", tags=["Announcements Routes"])
 app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
 
@@ -1,7 +1,13 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Enum
+from datetime import datetime, timezone
+from sqlalchemy import Column, Integer, String, ForeignKey, Enum, DateTime, JSON, Index, Float, UniqueConstraint
 from sqlalchemy.orm import relationship
 from database import Base
 
+
+# Naive UTC timestamp, used for the outbox scheduling columns
+def utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
 class Users(Base):
     __tablename__ = "users"
 
@@ -74,4 +80,55 @@ class Announcement(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True)
-    description = Column(String)
\ No newline at end of file
+    description = Column(String)
+
+class Outbox(Base):
+    __tablename__ = "outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    event_type = Column(String)  # e.g. "share_food.accepted"
+    aggregate_id = Column(Integer)  # id of the ShareFood / NeedFood row
+    recipient_user_id = Column(Integer, ForeignKey('users.id'), nullable=True)
+    payload = Column(JSON)
+    status = Column(Enum("Pending", "Sent", "Failed", name="outbox_status_enum"), default="Pending")
+    attempts = Column(Integer, default=0)
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=utcnow)
+    next_attempt_at = Column(DateTime, default=utcnow)
+    sent_at = Column(DateTime, nullable=True)
+
+    # The dispatcher polls for due pending events
+    __table_args__ = (Index("ix_outbox_status_next_attempt_at", "status", "next_attempt_at"),)
+
+# Listing coordinates parsed from `koordinat`, the leaf level of the map index
+class MapPoint(Base):
+    __tablename__ = "map_points"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String)  # "share" or "need"
+    listing_id = Column(Integer)
+    lat = Column(Float)
+    lng = Column(Float)
+    jumlah_makanan = Column(Integer)
+
+    __table_args__ = (
+        UniqueConstraint("kind", "listing_id", name="uq_map_points_kind_listing"),
+        Index("ix_map_points_lat_lng", "lat", "lng"),
+    )
+
+
+# Per-zoom grid cell aggregates, updated together with every listing insert/delete
+class MapCell(Base):
+    __tablename__ = "map_cells"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String)
+    zoom = Column(Integer)
+    x = Column(Integer)
+    y = Column(Integer)
+    count = Column(Integer, default=0)
+    sum_lat = Column(Float, default=0.0)
+    sum_lng = Column(Float, default=0.0)
+    sum_jumlah = Column(Integer, default=0)
+
+    __table_args__ = (UniqueConstraint("zoom", "x", "y", "kind", name="uq_map_cells_zoom_x_y_kind"),)
@@ -0,0 +1,230 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from datetime import timedelta
+
+import anyio
+import anyio.to_thread
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from database import SessionLocal
+from models import Outbox, utcnow
+
+# uvicorn (and gunicorn's uvicorn workers) only configure the uvicorn.*
+# loggers, so log through uvicorn.error to get the messages out
+logger = logging.getLogger("uvicorn.error")
+
+# Dispatcher settings
+OUTBOX_DISPATCHER = os.getenv("OUTBOX_DISPATCHER", "1") != "0"
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "1.0"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+OUTBOX_BACKOFF_BASE = float(os.getenv("OUTBOX_BACKOFF_BASE", "2.0"))
+OUTBOX_BACKOFF_MAX = float(os.getenv("OUTBOX_BACKOFF_MAX", "300.0"))
+# How long a claimed batch stays invisible to other workers
+OUTBOX_LEASE = float(os.getenv("OUTBOX_LEASE", "60.0"))
+# Sent rows are deleted once older than this (seconds, default 7 days);
+# the cleanup runs at most every OUTBOX_CLEANUP_INTERVAL while idle
+OUTBOX_RETENTION = float(os.getenv("OUTBOX_RETENTION", str(7 * 24 * 3600)))
+OUTBOX_CLEANUP_INTERVAL = float(os.getenv("OUTBOX_CLEANUP_INTERVAL", "300.0"))
+
+# Deliveries to send at once, separate from the request threadpool
+NOTIFY_CONCURRENCY = int(os.getenv("NOTIFY_CONCURRENCY", "10"))
+NOTIFY_WEBHOOK_URL = os.getenv("NOTIFY_WEBHOOK_URL")
+NOTIFY_WEBHOOK_TIMEOUT = float(os.getenv("NOTIFY_WEBHOOK_TIMEOUT", "5.0"))
+
+
+# Queue a notification for a ShareFood / NeedFood status change. Only adds
+# the row to the session: it is committed together with the status change.
+def add_status_event(db: Session, kind: str, listing) -> Outbox:
+    event = Outbox(
+        event_type=f"{kind}.{listing.status.lower()}",
+        aggregate_id=listing.id,
+        recipient_user_id=listing.user_id,
+        payload={
+            "type": kind,
+            "id": listing.id,
+            "status": listing.status,
+            "user_id": listing.user_id,
+            "nama_kegiatan": listing.nama_kegiatan,
+        },
+    )
+    db.add(event)
+    return event
+
+
+# Sinks receive one event dict at a time and raise to have it retried
+
+# Local stand-in that only logs the notifications
+class LogSink:
+    async def send(self, event: dict):
+        logger.info("Notification %s: %s", event["event_type"], event["payload"])
+
+
+# POSTs each event as JSON to a webhook URL
+class WebhookSink:
+    def __init__(self, url: str, timeout: float = NOTIFY_WEBHOOK_TIMEOUT, concurrency: int = NOTIFY_CONCURRENCY):
+        self.url = url
+        self.timeout = timeout
+        self.limiter = anyio.CapacityLimiter(concurrency)
+
+    def _post(self, event: dict):
+        import requests
+
+        response = requests.post(
+            self.url,
+            json=event,
+            timeout=self.timeout,
+            # Lets the receiver drop duplicates after a retry
+            headers={"Idempotency-Key": f"outbox-{event['id']}"},
+        )
+        response.raise_for_status()
+
+    async def send(self, event: dict):
+        await anyio.to_thread.run_sync(self._post, event, limiter=self.limiter)
+
+
+def get_sink():
+    if NOTIFY_WEBHOOK_URL:
+        return WebhookSink(NOTIFY_WEBHOOK_URL)
+    return LogSink()
+
+
+# Exponential backoff with full jitter
+def backoff_delay(attempts: int) -> float:
+    return random.uniform(0, min(OUTBOX_BACKOFF_MAX, OUTBOX_BACKOFF_BASE * 2 ** (attempts - 1)))
+
+
+# Background worker that delivers pending outbox rows to a sink in batches.
+# Runs on the event loop next to the app, never inside a request.
+class OutboxDispatcher:
+    def __init__(self, sink=None, batch_size: int = OUTBOX_BATCH_SIZE, poll_interval: float = OUTBOX_POLL_INTERVAL):
+        self.sink = sink or get_sink()
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._stopping = asyncio.Event()
+        self._task = None
+        self._last_cleanup = 0.0
+
+    # Lock a batch of due events and push their next attempt past the lease,
+    # so other gunicorn workers skip them while they are being delivered
+    def claim_batch(self) -> list:
+        db = SessionLocal()
+        try:
+            now = utcnow()
+            rows = (
+                db.query(Outbox)
+                .filter(Outbox.status == "Pending", Outbox.next_attempt_at <= now)
+                .order_by(Outbox.id)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+            events = []
+            for row in rows:
+                row.next_attempt_at = now + timedelta(seconds=OUTBOX_LEASE)
+                events.append({
+                    "id": row.id,
+                    "event_type": row.event_type,
+                    "recipient_user_id": row.recipient_user_id,
+                    "payload": row.payload,
+                    "created_at": row.created_at.isoformat(),
+                })
+            db.commit()
+            return events
+        finally:
+            db.close()
+
+    # Record the outcome of a batch: {event id: None on success, else the error}
+    def mark_results(self, results: dict):
+        db = SessionLocal()
+        try:
+            now = utcnow()
+            rows = db.query(Outbox).filter(Outbox.id.in_(list(results))).all()
+            for row in rows:
+                error = results[row.id]
+                row.attempts = (row.attempts or 0) + 1
+                if error is None:
+                    row.status = "Sent"
+                    row.sent_at = now
+                    row.last_error = None
+                    continue
+                row.last_error = str(error)[:500]
+                if row.attempts >= OUTBOX_MAX_ATTEMPTS:
+                    row.status = "Failed"
+                    logger.error("Outbox event %s failed after %d attempts: %s", row.id, row.attempts, error)
+                else:
+                    row.next_attempt_at = now + timedelta(seconds=backoff_delay(row.attempts))
+            db.commit()
+        finally:
+            db.close()
+
+    # Delete Sent rows past the retention period; Failed rows are kept for
+    # inspection. Returns the number of rows removed.
+    def purge_sent(self) -> int:
+        db = SessionLocal()
+        try:
+            cutoff = utcnow() - timedelta(seconds=OUTBOX_RETENTION)
+            deleted = (
+                db.query(Outbox)
+                .filter(Outbox.status == "Sent", Outbox.sent_at < cutoff)
+                .delete(synchronize_session=False)
+            )
+            db.commit()
+            return deleted
+        finally:
+            db.close()
+
+    async def _cleanup_if_due(self):
+        now = time.monotonic()
+        if now - self._last_cleanup < OUTBOX_CLEANUP_INTERVAL:
+            return
+        self._last_cleanup = now
+        deleted = await run_in_threadpool(self.purge_sent)
+        if deleted:
+            logger.info("Removed %d sent outbox events", deleted)
+
+    async def _deliver(self, event: dict):
+        try:
+            await self.sink.send(event)
+        except Exception as exc:
+            return exc
+        return None
+
+    # Deliver one batch; returns how many events were claimed
+    async def dispatch_once(self) -> int:
+        events = await run_in_threadpool(self.claim_batch)
+        if not events:
+            return 0
+        errors = await asyncio.gather(*(self._deliver(event) for event in events))
+        await run_in_threadpool(self.mark_results, {e["id"]: err for e, err in zip(events, errors)})
+        return len(events)
+
+    async def run(self):
+        while not self._stopping.is_set():
+            try:
+                claimed = await self.dispatch_once()
+            except Exception:
+                logger.exception("Outbox dispatch failed")
+                claimed = 0
+            # A full batch means there is probably more waiting
+            if claimed < self.batch_size:
+                try:
+                    await self._cleanup_if_due()
+                except Exception:
+                    logger.exception("Outbox cleanup failed")
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    def start(self):
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        self._stopping.set()
+        if self._task is not None:
+            await self._task
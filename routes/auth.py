@@ -1,9 +1,7 @@
 import os
-import bcrypt
 from fastapi import FastAPI, HTTPException, status, Depends, APIRouter
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
-from jose import jwt, JWTError
 from pydantic import BaseModel
 
 from models import Users
@@ -14,19 +12,29 @@ from dto import TokenResponseModel, UserSignupModel  # Define DTO classes
 # OAuth2PasswordBearer for token authentication
 oauth2_token_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+# bcrypt and python-jose (which pulls in cryptography) are imported inside the
+# functions that use them to keep them off the import path of main.py;
+# startup.warm_up() loads them before the first request is served
+
 # Function to generate JWT token
 def __generate_token(data: dict) -> str:
+    from jose import jwt
+
     to_encode = data.copy()
     token = jwt.encode(to_encode, os.getenv("SECRET"), algorithm=os.getenv("ALGORITHM"))
     return token
 
 # Function to validate password (hash check)
 def __validate_password(password: str, true_password: str) -> bool:
+    import bcrypt
+
     b_password = password.encode(encoding='utf-8')
     return bcrypt.checkpw(b_password, bytes(true_password, encoding='utf-8'))
 
 # Function to validate JWT token and extract user information
 def get_current_user(token: str = Depends(oauth2_token_scheme), db: Session = Depends(get_db)):
+    from jose import jwt, JWTError
+
     try:
         payload = jwt.decode(token, os.getenv("SECRET"), algorithms=[os.getenv("ALGORITHM")])
         user_id = payload.get("id")
@@ -79,6 +87,8 @@ def user_login(
 # Signup endpoint
 @auth_router.post("/signup", status_code=status.HTTP_201_CREATED)
 def signup(user_data: UserSignupModel, db: Session = Depends(get_db)):
+    import bcrypt
+
     # Check if email or username is already in use
     existing_user = db.query(Users).filter(
         (Users.email == user_data.email) | (Users.name == user_data.name)
@@ -0,0 +1,54 @@
+import hashlib
+import json
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from sqlalchemy.orm import Session
+
+from database import get_db
+from geo_index import query_map, BBoxTooLarge, LISTING_MODELS
+
+map_router = APIRouter()
+
+
+def parse_bbox(bbox: str) -> tuple:
+    try:
+        min_lng, min_lat, max_lng, max_lat = (float(part) for part in bbox.split(","))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="bbox must be min_lng,min_lat,max_lng,max_lat")
+    if not (-180 <= min_lng <= max_lng <= 180 and -90 <= min_lat <= max_lat <= 90):
+        raise HTTPException(status_code=400, detail="bbox is out of range or inverted")
+    return min_lng, min_lat, max_lng, max_lat
+
+
+# Clustered listings for a map tile
+@map_router.get("/map", status_code=200)
+def get_food_map(
+    request: Request,
+    bbox: str = Query(..., description="min_lng,min_lat,max_lng,max_lat"),
+    zoom: int = Query(..., ge=0, le=22),
+    type: Optional[str] = Query(None, description="share or need, both when omitted"),
+    db: Session = Depends(get_db)
+):
+    """
+    Return clusters (count, centroid, total jumlah_makanan) of the ShareFood
+    and NeedFood listings inside bbox, or the individual listings at high zoom
+    ("truncated" is set when there are more than the response can hold).
+    """
+    if type is not None and type not in LISTING_MODELS:
+        raise HTTPException(status_code=400, detail="type must be 'share' or 'need'")
+
+    try:
+        data = query_map(db, parse_bbox(bbox), zoom, type)
+    except BBoxTooLarge as e:
+        raise HTTPException(status_code=400, detail=f"{e}; use a smaller bbox or a lower zoom")
+
+    # Tiles are requested over and over while panning, so let clients and
+    # proxies revalidate with If-None-Match instead of downloading again
+    body = json.dumps(data, separators=(",", ":")).encode("utf-8")
+    etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+    headers = {"ETag": etag, "Cache-Control": "public, no-cache"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -5,6 +5,8 @@ from typing import List
 from models import NeedFood, Users
 from database import get_db
 from routes.auth import get_current_user
+from outbox import add_status_event
+from geo_index import index_listing, unindex_listing, unindex_listings
 from pydantic import BaseModel
 
 
@@ -69,6 +71,8 @@ def create_need_food(
     )
     
     db.add(new_need_food)
+    db.flush()
+    index_listing(db, "need", new_need_food)  # Keep the map index in the same transaction
     db.commit()
     db.refresh(new_need_food)
     
@@ -100,6 +104,7 @@ def delete_all_need_foods(
         raise HTTPException(status_code=404, detail="No food requests found for this user")
 
     # Delete all found NeedFood entries
+    unindex_listings(db, "need", [need_food.id for need_food in need_foods])
     for need_food in need_foods:
         db.delete(need_food)
     
@@ -125,14 +130,15 @@ def accept_need_food(
     # if need_food.user_id != current_user.id:
     #     raise HTTPException(status_code=403, detail="Not authorized to accept this food request")
 
-    # Change the status to Accepted
+    # Change the status to Accepted and queue the notification in the same commit
     need_food.status = "Accepted"
+    add_status_event(db, "need_food", need_food)
     db.commit()
 
     return {"message": "Food request successfully accepted", "need_food_id": need_food.id}
 
 @need_router.post("/need/reject/{need_food_id}", status_code=200)
-def accept_need_food(
+def reject_need_food(
     need_food_id: int, 
     # current_user: Users = Depends(get_current_user),  # Automatically get current logged-in user
     db: Session = Depends(get_db)
@@ -148,8 +154,9 @@ def accept_need_food(
     # if need_food.user_id != current_user.id:
     #     raise HTTPException(status_code=403, detail="Not authorized to accept this food request")
 
-    # Change the status to Accepted
+    # Change the status to Rejected and queue the notification in the same commit
     need_food.status = "Rejected"
+    add_status_event(db, "need_food", need_food)
     db.commit()
 
     return {"message": "Food request is rejected", "need_food_id": need_food.id}
@@ -172,6 +179,7 @@ def delete_need_food(
     #     raise HTTPException(status_code=403, detail="Not authorized to delete this food request")
     
     # Delete the found NeedFood entry
+    unindex_listing(db, "need", need_food.id)
     db.delete(need_food)
     db.commit()
 
@@ -7,6 +7,8 @@ from uuid import uuid4
 from models import ShareFood, Users
 from database import get_db
 from routes.auth import get_current_user
+from outbox import add_status_event
+from geo_index import index_listing, unindex_listing, unindex_listings
 from pydantic import BaseModel
 
 UPLOAD_DIR = "uploads/share_food"
@@ -99,6 +101,8 @@ async def create_share_food_with_image(
     )
     
     db.add(new_share_food)
+    db.flush()
+    index_listing(db, "share", new_share_food)  # Keep the map index in the same transaction
     db.commit()
     db.refresh(new_share_food)
     
@@ -131,6 +135,7 @@ def delete_all_share_foods(
         raise HTTPException(status_code=404, detail="No food share found for this user")
 
     # Delete all found shareFood entries
+    unindex_listings(db, "share", [share_food.id for share_food in share_foods])
     for share_food in share_foods:
         db.delete(share_food)
     
@@ -151,8 +156,9 @@ def accept_share_food(
     if not share_food:
         raise HTTPException(status_code=404, detail="Food request not found")
 
-    # Ubah status menjadi Accepted
+    # Ubah status menjadi Accepted, notifikasi disimpan dalam commit yang sama
     share_food.status = "Accepted"
+    add_status_event(db, "share_food", share_food)
     db.commit()
     db.refresh(share_food)
 
@@ -195,8 +201,9 @@ def reject_share_food(
     if not share_food:
         raise HTTPException(status_code=404, detail="Food request not found")
 
-    # Change the status to Rejected
+    # Change the status to Rejected and queue the notification in the same commit
     share_food.status = "Rejected"
+    add_status_event(db, "share_food", share_food)
     db.commit()
 
     return {"message": "Food request is rejected", "share_food_id": share_food.id}
@@ -219,6 +226,7 @@ def delete_share_food(
     #     raise HTTPException(status_code=403, detail="Not authorized to delete this food request")
     
     # Delete the found shareFood entry
+    unindex_listing(db, "share", share_food.id)
     db.delete(share_food)
     db.commit()
 
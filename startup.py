@@ -0,0 +1,104 @@
+import logging
+import os
+from contextlib import asynccontextmanager
+
+import anyio.to_thread
+from fastapi import FastAPI
+from starlette.concurrency import run_in_threadpool
+
+from database import engine, ensure_tables, has_table, prewarm_pool, SessionLocal, POOL_SIZE, MAX_OVERFLOW
+from models import MapCell, MapPoint, Outbox
+from outbox import OutboxDispatcher, OUTBOX_DISPATCHER
+
+# uvicorn (and gunicorn's uvicorn workers) only configure the uvicorn.*
+# loggers, so log through uvicorn.error to get the messages out
+logger = logging.getLogger("uvicorn.error")
+
+# Set WARMUP_ENABLED=0 to skip the startup warm-up (e.g. for local tooling)
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "1") != "0"
+
+# Sync route handlers run in AnyIO's worker threads and each holds a DB
+# session, so more threads than pool connections would only queue on the pool
+THREADPOOL_LIMIT = int(os.getenv("THREADPOOL_LIMIT", str(POOL_SIZE + MAX_OVERFLOW)))
+
+
+# Load the modules that routes/auth.py imports lazily
+def warm_imports():
+    import bcrypt  # noqa: F401
+    from jose import jwt  # noqa: F401
+
+
+# Run the per-id lookups the routes issue on most requests once, so the ORM
+# mappers are configured and the compiled SQL is already in the engine's
+# statement cache when the first real request comes in
+def warm_statements():
+    from sqlalchemy.orm import configure_mappers
+    from models import Announcement, NeedFood, ShareFood, Users
+
+    configure_mappers()
+
+    db = SessionLocal()
+    try:
+        db.query(Users).filter(Users.id == 0).first()
+        db.query(Users).filter((Users.email == "") | (Users.name == "")).first()
+        db.query(NeedFood).filter(NeedFood.id == 0).first()
+        db.query(ShareFood).filter(ShareFood.id == 0).first()
+        db.query(Announcement).filter(Announcement.id == 0).first()
+    finally:
+        db.close()
+
+
+# Tables added after the initial schema, created on startup if missing
+STARTUP_TABLES = [Outbox.__table__, MapPoint.__table__, MapCell.__table__]
+
+
+def ensure_schema():
+    try:
+        created = ensure_tables(STARTUP_TABLES)
+        if created:
+            logger.warning("Created missing tables: %s", ", ".join(created))
+        if MapPoint.__tablename__ in created:
+            logger.warning("Map index is empty, run `python geo_index.py` to index existing listings")
+    except Exception:
+        logger.exception("Could not create missing tables")
+
+
+def warm_up():
+    warm_imports()
+
+    # The app didn't need the database to boot before, so a failed warm-up
+    # is logged instead of stopping the server
+    try:
+        opened = prewarm_pool()
+        warm_statements()
+        logger.info("Warm-up done, %d pool connections ready", opened)
+    except Exception:
+        logger.exception("Database warm-up failed, continuing without it")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_LIMIT
+    await run_in_threadpool(ensure_schema)
+    if WARMUP_ENABLED:
+        await run_in_threadpool(warm_up)
+
+    # Delivers status change notifications in the background. Checked once
+    # here so a missing table doesn't make the dispatcher fail on every poll.
+    dispatcher = None
+    if OUTBOX_DISPATCHER:
+        try:
+            outbox_ready = await run_in_threadpool(has_table, Outbox.__tablename__)
+        except Exception:
+            outbox_ready = False
+        if outbox_ready:
+            dispatcher = OutboxDispatcher()
+            dispatcher.start()
+        else:
+            logger.warning("Table %s not available, outbox dispatcher not started", Outbox.__tablename__)
+
+    yield
+
+    if dispatcher is not None:
+        await dispatcher.stop()
+    engine.dispose()